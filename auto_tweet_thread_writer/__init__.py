@@ -5,4 +5,4 @@ generate a Twitter thread.  See :mod:`auto_tweet_thread_writer.cli` for
 command‑line usage.
 """
 
-__all__ = ["scraper", "writer", "cli"]
\ No newline at end of file
+__all__ = ["scraper", "writer", "cache", "cli"]
\ No newline at end of file
@@ -0,0 +1,30 @@
+"""JSON helpers that use :mod:`orjson` when it is installed.
+
+``orjson`` parses and serialises several times faster than the standard
+library.  Both implementations are interchangeable here: :func:`dumps`
+always returns ``str`` with non-ASCII characters left unescaped.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Deserialise the JSON document ``data``."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Serialise ``obj`` to a compact JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
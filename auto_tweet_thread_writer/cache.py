@@ -0,0 +1,162 @@
+"""On-disk caches for the Auto Tweet Thread Writer.
+
+Summaries produced by the language model are expensive to regenerate, so
+they are stored in a small SQLite database under the user's cache directory
+(``$XDG_CACHE_HOME/auto_tweet_thread_writer`` or
+``~/.cache/auto_tweet_thread_writer``).  Finished threads are stored
+alongside the page's HTTP validators (``ETag`` / ``Last-Modified``) so that
+an unchanged page can be detected with a conditional request.  Keys are
+produced by :func:`make_key`, a short BLAKE2b digest of the inputs that
+determine the cached value.  When :mod:`zstandard` is installed, stored
+summaries and threads are compressed with Zstandard.  Any error while
+reading or writing the cache is logged and otherwise ignored: the cache is
+an optimisation, never a requirement.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+from . import _json
+
+try:
+    import zstandard  # type: ignore
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+_SUMMARIES_DB = "summaries.sqlite"
+_THREADS_DB = "threads.sqlite"
+_ZSTD_LEVEL = 3
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def cache_dir() -> Path:
+    """Return the directory in which cache databases are stored."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    return Path(base) / "auto_tweet_thread_writer"
+
+
+def make_key(*parts: Union[str, int, None]) -> str:
+    """Return a 128-bit hex digest identifying ``parts``."""
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(repr(part).encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def text_digest(text: str) -> str:
+    """Return a 128-bit hex digest of ``text``."""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _encode(text: str) -> Union[str, bytes]:
+    """Return ``text`` as stored in the database: a zstd frame if possible."""
+    if zstandard is None:
+        return text
+    # Compressor objects are not thread-safe, so make one per call
+    return zstandard.ZstdCompressor(level=_ZSTD_LEVEL).compress(text.encode("utf-8"))
+
+
+def _decode(value: Union[str, bytes]) -> Optional[str]:
+    """Inverse of :func:`_encode`; ``None`` if ``value`` cannot be decoded here."""
+    if isinstance(value, str):
+        return value
+    if value.startswith(_ZSTD_MAGIC):
+        if zstandard is None:
+            # Written by an installation that had zstandard; treat as a miss
+            return None
+        try:
+            value = zstandard.ZstdDecompressor().decompress(value)
+        except zstandard.ZstdError:
+            return None
+    return value.decode("utf-8")
+
+
+def _connect(filename: str) -> sqlite3.Connection:
+    path = cache_dir()
+    path.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path / filename), timeout=5)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def _summaries() -> sqlite3.Connection:
+    conn = _connect(_SUMMARIES_DB)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS summaries (key TEXT PRIMARY KEY, summary TEXT NOT NULL)"
+    )
+    return conn
+
+
+def get_summary(key: str) -> Optional[str]:
+    """Return the cached summary stored under ``key``, or ``None``."""
+    try:
+        with closing(_summaries()) as conn:
+            row = conn.execute(
+                "SELECT summary FROM summaries WHERE key = ?", (key,)
+            ).fetchone()
+        return _decode(row[0]) if row else None
+    except (OSError, sqlite3.Error, ValueError) as exc:
+        logger.debug("Summary cache read failed: %s", exc)
+        return None
+
+
+def put_summary(key: str, summary: str) -> None:
+    """Store ``summary`` under ``key``, replacing any previous value."""
+    try:
+        with closing(_summaries()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary) VALUES (?, ?)",
+                (key, _encode(summary)),
+            )
+    except (OSError, sqlite3.Error) as exc:
+        logger.debug("Summary cache write failed: %s", exc)
+
+
+def _threads() -> sqlite3.Connection:
+    conn = _connect(_THREADS_DB)
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS threads ("
+        "key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, tweets TEXT NOT NULL)"
+    )
+    return conn
+
+
+def get_thread(key: str) -> Optional[Tuple[Optional[str], Optional[str], List[str]]]:
+    """Return ``(etag, last_modified, tweets)`` stored under ``key``, or ``None``."""
+    try:
+        with closing(_threads()) as conn:
+            row = conn.execute(
+                "SELECT etag, last_modified, tweets FROM threads WHERE key = ?", (key,)
+            ).fetchone()
+        tweets = _decode(row[2]) if row else None
+        if tweets is None:
+            return None
+        return row[0], row[1], _json.loads(tweets)
+    except (OSError, sqlite3.Error, ValueError) as exc:
+        logger.debug("Thread cache read failed: %s", exc)
+        return None
+
+
+def put_thread(
+    key: str, etag: Optional[str], last_modified: Optional[str], tweets: List[str]
+) -> None:
+    """Store ``tweets`` and the page validators under ``key``."""
+    try:
+        with closing(_threads()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO threads (key, etag, last_modified, tweets) "
+                "VALUES (?, ?, ?, ?)",
+                (key, etag, last_modified, _encode(_json.dumps(tweets))),
+            )
+    except (OSError, sqlite3.Error) as exc:
+        logger.debug("Thread cache write failed: %s", exc)
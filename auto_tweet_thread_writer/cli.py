@@ -43,6 +43,12 @@ def parse_args(argv: List[str]) -> argparse.Namespace:
         default=10,
         help="Number of tweets to generate (default: 10)",
     )
+    parser.add_argument(
+        "--no-cache",
+        dest="cache_ok",
+        action="store_false",
+        help="Ignore cached threads and summaries and regenerate from scratch.",
+    )
     return parser.parse_args(argv)
 
 
@@ -56,6 +62,7 @@ def main(argv: Optional[List[str]] = None) -> int:
             openai_api_key=args.openai_api_key,
             title=args.title,
             max_tweets=args.max_tweets,
+            cache_ok=args.cache_ok,
         )
     except Exception as exc:
         print(f"Error generating thread: {exc}", file=sys.stderr)
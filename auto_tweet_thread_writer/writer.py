@@ -3,100 +3,657 @@
 This module provides functions to summarise text and assemble it into a
 Twitter thread.  The central function, :func:`generate_thread`, takes a URL
 and optional OpenAI API key, fetches the page content, summarises it, and
-returns a list of tweets.  Each tweet includes a serial indicator and an
-emoji to improve readability.
+returns a list of tweets.  With an API key the model is first asked to write
+the tweets itself as JSON; otherwise (or if that answer is unusable) the
+summary is split into tweets locally.  Each tweet includes a serial
+indicator and an emoji to improve readability.  :func:`generate_threads`
+does the same for several URLs at once, downloading and summarising the
+pages concurrently.
 """
 
 from __future__ import annotations
 
+import functools
+import heapq
+import io
+import itertools
+import logging
 import math
-import random
-from typing import List, Optional
+import re
+import textwrap
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
-from .scraper import fetch_content
+from . import _json, cache
+from .scraper import fetch_content, fetch_content_conditional
 
+logger = logging.getLogger(__name__)
 
-def _summarize_text(text: str, openai_api_key: Optional[str], target_words: int = 300) -> str:
+_MODEL = "gpt-3.5-turbo"
+# Emoji list for visual interest; tweet i uses _EMOJIS[(i - 1) % len(_EMOJIS)]
+_EMOJIS = ["🚀", "💡", "📌", "🔍", "🔥", "📘", "✅", "🌟", "🎯", "🧠"]
+_SYSTEM_PROMPT = (
+    "You turn long-form web content into concise, accurate summaries and Twitter "
+    "threads. Stay faithful to the source and do not invent facts."
+)
+# Context window of _MODEL, its completion limit, and the completion
+# budget reserved per summary
+_MODEL_CONTEXT = 16385
+_MAX_COMPLETION_TOKENS = 4096
+_SUMMARY_TOKENS = 400
+# Completion budget per tweet when asking for ready-made tweets
+_TWEET_TOKENS = 100
+# Most documents one batch request may hold without its combined answer
+# exceeding _MAX_COMPLETION_TOKENS
+_MAX_BATCH_DOCS = _MAX_COMPLETION_TOKENS // _SUMMARY_TOKENS
+# Tokens reserved for the batch instructions and per-document headers
+_PROMPT_OVERHEAD = 200
+# Longest document (in tokens) that fits in a request on its own
+_PER_DOC_LIMIT = _MODEL_CONTEXT - _PROMPT_OVERHEAD - _SUMMARY_TOKENS
+# Longest tweet body, leaving room for the emoji and "i/n" numbering
+_MAX_PART = 245
+# Partition inputs with at least this many units use the Numba kernel.
+# Importing Numba and loading the cached kernel takes about 340 ms, and the
+# kernel saves about 0.12 us per unit over plain Python, so it only pays off
+# around three million units.  Summaries written by this package are tens
+# of units long; the kernel is for callers chunking very long texts.
+_JIT_MIN_UNITS = 3_000_000
+# Sentence boundary: whitespace after terminal punctuation (optionally
+# followed by a closing quote or bracket) and before a capital or digit,
+# or any line break.
+_SENT_RE = re.compile(
+    r"""(?:(?<=[.!?])|(?<=[.!?]["'”’)\]]))\s+(?=["'“‘(\[]?[A-Z0-9])|\s*\n\s*"""
+)
+_WORD_RE = re.compile(r"\S+")
+_SUMMARY_HEADING_RE = re.compile(
+    r"^#{1,6}\s*Summary\s+(\d+)\s*:?\s*$", re.MULTILINE | re.IGNORECASE
+)
+
+
+def _prompt_messages(docs: Sequence[str], instruction: str) -> List[Dict[str, str]]:
+    """Return chat messages asking the model to apply ``instruction`` to ``docs``.
+
+    The messages are laid out as constant system prompt, then the
+    document(s), then the instruction, so that everything that varies
+    between requests about the same page (tweet count, summary length,
+    output format) comes last.  Repeat requests for a page therefore share
+    a byte-identical prefix, which OpenAI's prompt cache serves without
+    reprocessing.
+    """
+    if len(docs) == 1:
+        body = docs[0]
+    else:
+        body = "\n\n".join(f"Document {i}:\n{doc}" for i, doc in enumerate(docs, start=1))
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": body},
+        {"role": "user", "content": instruction},
+    ]
+
+
+@functools.lru_cache(maxsize=None)
+def _openai_module():
+    # Imported on first use: the openai package is optional and slow to import
+    import openai  # type: ignore
+    return openai
+
+
+def _get_openai(openai_api_key: str):
+    """Return the :mod:`openai` module configured with ``openai_api_key``."""
+    openai = _openai_module()
+    openai.api_key = openai_api_key
+    return openai
+
+
+def _summarize_text(
+    text: str,
+    openai_api_key: Optional[str],
+    target_words: int = 300,
+    cache_ok: bool = True,
+    on_delta: Optional[Callable[[str], None]] = None,
+) -> str:
+    """Return a summary of ``text``; see :func:`_summarize_with_status`."""
+    return _summarize_with_status(text, openai_api_key, target_words, cache_ok, on_delta)[0]
+
+
+def _summarize_with_status(
+    text: str,
+    openai_api_key: Optional[str],
+    target_words: int = 300,
+    cache_ok: bool = True,
+    on_delta: Optional[Callable[[str], None]] = None,
+) -> Tuple[str, bool]:
     """Return a summary of ``text`` limited to roughly ``target_words`` words.
 
     If an OpenAI API key is provided, this function uses the GPT model to
     produce a concise summary.  Otherwise, it falls back to returning the
-    first ``target_words`` words of the input.
+    first ``target_words`` words of the input.  Model summaries are cached on
+    disk (see :mod:`auto_tweet_thread_writer.cache`); pass ``cache_ok=False``
+    to bypass the cache.
+
+    The model's answer is streamed.  If ``on_delta`` is given, it is called
+    with each piece of the summary as soon as it arrives (or once with the
+    whole summary when it comes from the cache or the fallback), so callers
+    can start post-processing before the response is complete.
+
+    The second item of the result is ``False`` when a model summary was
+    asked for but not obtained, i.e. the request failed or the stream was
+    interrupted and the fallback or a partial summary was returned instead.
     """
-    words = text.split()
-    if not words:
-        return ""
+    if not text or text.isspace():
+        return "", True
     if openai_api_key:
+        key = cache.make_key(_MODEL, target_words, cache.text_digest(text))
+        cached = cache.get_summary(key) if cache_ok else None
+        if cached is not None:
+            if on_delta:
+                on_delta(cached)
+            return cached, True
+        buf = io.StringIO()
         try:
-            import openai  # type: ignore
-            openai.api_key = openai_api_key
-            prompt = (
-                "Summarise the following text into a concise overview. Focus on the key "
+            openai = _get_openai(openai_api_key)
+            instruction = (
+                "Summarise the document above into a concise overview. Focus on the key "
                 "ideas and eliminate unnecessary detail. Limit the summary to around "
-                f"{target_words} words.\n\n{text}\n\nSummary:"
+                f"{target_words} words."
             )
             response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=400,
+                model=_MODEL,
+                messages=_prompt_messages([text], instruction),
+                max_tokens=_SUMMARY_TOKENS,
                 temperature=0.3,
+                stream=True,
             )
-            return response.choices[0].message.content.strip()
-        except Exception:
-            pass
-    # Fallback: naive summarisation by truncating
-    return " ".join(words[:target_words])
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                delta = getattr(chunk.choices[0].delta, "content", None)
+                if delta:
+                    buf.write(delta)
+                    if on_delta:
+                        on_delta(delta)
+        except Exception as exc:
+            if buf.tell():
+                # Part of the summary has already been handed to on_delta, so
+                # return what arrived rather than restarting with the fallback.
+                logger.debug("Summary stream interrupted: %s", exc)
+                return buf.getvalue().strip(), False
+        else:
+            summary = buf.getvalue().strip()
+            if cache_ok:
+                cache.put_summary(key, summary)
+            return summary, True
+    # Fallback: naive summarisation by truncating after ``target_words`` words.
+    # Walk the matches lazily rather than splitting the whole (possibly huge)
+    # page into a list of words.
+    last = None
+    for last in itertools.islice(_WORD_RE.finditer(text), target_words):
+        pass
+    # The slice ends on a word, so only leading whitespace needs removing
+    summary = text[: last.end()].lstrip() if last else ""
+    if on_delta:
+        on_delta(summary)
+    return summary, not openai_api_key
 
 
-def _chunk_text(summary: str, n_parts: int) -> List[str]:
-    """Divide ``summary`` into ``n_parts`` roughly equal chunks by character length.
+def _generate_tweet_parts(
+    text: str,
+    openai_api_key: str,
+    n_parts: int,
+    cache_ok: bool = True,
+) -> Optional[List[str]]:
+    """Ask the model to write ``text`` up directly as ``n_parts`` tweet bodies.
 
-    This function does not split in the middle of a word.  It ensures that
-    each part is within Twitter's limit (280 characters) by further splitting
-    long chunks if necessary.
+    The model is asked for a JSON object ``{"tweets": [...]}`` using the
+    API's JSON mode.  If the answer does not hold exactly ``n_parts``
+    non-empty strings of at most :data:`_MAX_PART` characters, the strings
+    it does hold are joined and re-split with :func:`_chunk_text`.  Returns
+    ``None`` only if the request fails or the answer holds no text, in which
+    case the caller falls back to summarising.  The parts are cached
+    alongside the summaries.
     """
-    summary = summary.strip()
-    if not summary:
-        return [""] * n_parts
-    # Break at sentence boundaries when possible
-    sentences = summary.split('. ')
-    # Basic algorithm: assemble sentences into chunks without exceeding char limit
-    parts: List[str] = []
-    current = ""
-    for sent in sentences:
-        seg = sent.strip()
-        if not seg:
+    if not text or text.isspace():
+        return None
+    key = cache.make_key("tweets", _MODEL, n_parts, cache.text_digest(text))
+    cached = cache.get_summary(key) if cache_ok else None
+    if cached is not None:
+        try:
+            return _json.loads(cached)
+        except ValueError as exc:
+            logger.debug("Ignoring unreadable cached tweets: %s", exc)
+    try:
+        openai = _get_openai(openai_api_key)
+        instruction = (
+            "Rewrite the document above as a Twitter thread that covers the key ideas "
+            "in order. Do not number the tweets or add emojis. Return a JSON object of "
+            f'the form {{"tweets": [...]}} whose array holds exactly {n_parts} strings, '
+            f"each at most {_MAX_PART} characters."
+        )
+        response = openai.ChatCompletion.create(
+            model=_MODEL,
+            messages=_prompt_messages([text], instruction),
+            response_format={"type": "json_object"},
+            max_tokens=_TWEET_TOKENS * n_parts,
+            temperature=0.3,
+        )
+        tweets = _json.loads(response.choices[0].message.content)["tweets"]
+    except Exception as exc:
+        logger.debug("Structured thread request failed: %s", exc)
+        return None
+    if not isinstance(tweets, list):
+        return None
+    parts = [t.strip() if isinstance(t, str) else "" for t in tweets]
+    if len(parts) != n_parts or not all(0 < len(part) <= _MAX_PART for part in parts):
+        text = " ".join(part for part in parts if part)
+        if not text:
+            return None
+        parts = _chunk_text(text, n_parts)
+    if cache_ok:
+        cache.put_summary(key, _json.dumps(parts))
+    return parts
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding():
+    """Return the ``tiktoken`` encoding for :data:`_MODEL`, or ``None``."""
+    try:
+        import tiktoken  # type: ignore
+        return tiktoken.encoding_for_model(_MODEL)
+    except Exception:
+        return None
+
+
+def _count_tokens(text: str) -> int:
+    """Return the number of model tokens in ``text``.
+
+    Uses ``tiktoken`` when installed; otherwise estimates four characters per
+    token, which is close enough for budgeting English prose.
+    """
+    enc = _get_encoding()
+    if enc is None:
+        return len(text) // 4 + 1
+    return len(enc.encode(text, disallowed_special=()))
+
+
+def _truncate_tokens(text: str, max_tokens: int) -> str:
+    """Return ``text`` cut down to at most ``max_tokens`` model tokens."""
+    enc = _get_encoding()
+    if enc is None:
+        return text[: max_tokens * 4]
+    tokens = enc.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return enc.decode(tokens[:max_tokens])
+
+
+def _batch_cost(text: str) -> int:
+    """Return the context tokens ``text`` takes up in a batch request, including its output."""
+    return min(_count_tokens(text), _PER_DOC_LIMIT) + _SUMMARY_TOKENS
+
+
+def _plan_batches(texts: Sequence[str]) -> List[List[Tuple[int, str]]]:
+    """Group ``texts`` into batches that each fit in a single request.
+
+    Every batch must leave room in the model's context for the instructions
+    plus :data:`_SUMMARY_TOKENS` of output per document, and holds at most
+    :data:`_MAX_BATCH_DOCS` documents so the answer fits the model's
+    completion limit.  Documents too long to fit even on their own are
+    truncated.  Returns lists of ``(index, text)`` pairs.
+    """
+    batches: List[List[Tuple[int, str]]] = []
+    current: List[Tuple[int, str]] = []
+    used = _PROMPT_OVERHEAD
+    for idx, text in enumerate(texts):
+        n_tokens = _count_tokens(text)
+        if n_tokens > _PER_DOC_LIMIT:
+            text = _truncate_tokens(text, _PER_DOC_LIMIT)
+            n_tokens = _PER_DOC_LIMIT
+        cost = n_tokens + _SUMMARY_TOKENS
+        if current and (used + cost > _MODEL_CONTEXT or len(current) >= _MAX_BATCH_DOCS):
+            batches.append(current)
+            current = []
+            used = _PROMPT_OVERHEAD
+        current.append((idx, text))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _request_batch_summaries(
+    docs: Sequence[str],
+    openai_api_key: str,
+    target_words: int,
+) -> Dict[int, str]:
+    """Summarise ``docs`` with a single chat completion.
+
+    Returns a mapping from zero-based document index to summary.  Documents
+    whose section is missing from the model's answer are left out; the
+    caller decides how to fill the gaps.
+    """
+    openai = _get_openai(openai_api_key)
+    n = len(docs)
+    instruction = (
+        "Summarise each of the documents above separately into a concise overview. "
+        "Focus on the key ideas and eliminate unnecessary detail. Answer with one "
+        "section per document, in order, each starting with a heading line "
+        f"'### Summary <number>'. Limit each summary to around {target_words} words. "
+        f"There are {n} documents, so write '### Summary 1' to '### Summary {n}'."
+    )
+    response = openai.ChatCompletion.create(
+        model=_MODEL,
+        messages=_prompt_messages(docs, instruction),
+        max_tokens=_SUMMARY_TOKENS * n,
+        temperature=0.3,
+    )
+    answer = response.choices[0].message.content
+    # re.split with one capture group yields [preamble, num, text, num, text, ...]
+    pieces = _SUMMARY_HEADING_RE.split(answer)
+    summaries: Dict[int, str] = {}
+    for num, text in zip(pieces[1::2], pieces[2::2]):
+        idx = int(num) - 1
+        text = text.strip()
+        if 0 <= idx < n and text:
+            summaries.setdefault(idx, text)
+    return summaries
+
+
+def _summarize_texts(
+    texts: Sequence[str],
+    openai_api_key: Optional[str],
+    target_words: int = 300,
+    cache_ok: bool = True,
+) -> List[str]:
+    """Summarise several documents, batching them into as few model calls as possible.
+
+    This is the multi-document counterpart of :func:`_summarize_text` and
+    follows the same rules: without an API key each text is truncated, and
+    cached summaries are reused.  Uncached documents are packed into batch
+    requests (see :func:`_plan_batches`).  If a batch request fails, or the
+    answer is missing a document's section, the affected documents are
+    summarised individually.
+    """
+    if not openai_api_key:
+        return [_summarize_text(text, None, target_words) for text in texts]
+    results: List[Optional[str]] = [None] * len(texts)
+    keys = [cache.make_key(_MODEL, target_words, cache.text_digest(text)) for text in texts]
+    pending: List[int] = []
+    for i, text in enumerate(texts):
+        if not text or text.isspace():
+            results[i] = ""
             continue
-        if current:
-            tentative = current + '. ' + seg
+        if cache_ok:
+            results[i] = cache.get_summary(keys[i])
+        if results[i] is None:
+            pending.append(i)
+    for batch in _plan_batches([texts[i] for i in pending]):
+        indices = [pending[j] for j, _ in batch]
+        if len(batch) > 1:
+            try:
+                summaries = _request_batch_summaries(
+                    [doc for _, doc in batch], openai_api_key, target_words
+                )
+            except Exception as exc:
+                logger.debug("Batch summarisation failed: %s", exc)
+                summaries = {}
+            for j, summary in summaries.items():
+                results[indices[j]] = summary
+                if cache_ok:
+                    cache.put_summary(keys[indices[j]], summary)
+        # Single documents, and any the batch answer left out, are summarised
+        # individually; use the batch's copy, which _plan_batches may have
+        # truncated to fit the context window.
+        for i, (_, doc) in zip(indices, batch):
+            if results[i] is None:
+                results[i] = _summarize_text(doc, openai_api_key, target_words, cache_ok)
+    return [r or "" for r in results]
+
+
+class _ChunkBuilder:
+    """Incrementally split a summary into sentences for :func:`_partition`.
+
+    Text may be fed in arbitrary pieces, such as tokens streamed from the
+    model: each sentence is recorded as soon as the boundary after it (see
+    :data:`_SENT_RE`) has arrived, and only the unfinished tail is buffered.
+    Call :meth:`finish` once all text has been fed to obtain exactly
+    ``n_parts`` parts.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._sentences: List[str] = []
+
+    def feed(self, text: str) -> None:
+        """Append ``text`` to the summary, recording any completed sentences."""
+        self._buffer += text
+        *sentences, self._buffer = _SENT_RE.split(self._buffer)
+        for sent in sentences:
+            self._add(sent)
+
+    def _add(self, sent: str) -> None:
+        seg = sent.strip()
+        if seg:
+            self._sentences.append(seg)
+
+    def finish(self, n_parts: int) -> List[str]:
+        """Flush the buffered tail and return exactly ``n_parts`` parts."""
+        self._add(self._buffer)
+        self._buffer = ""
+        return _partition(self._sentences, n_parts)
+
+
+def _split_at_word(text: str) -> Tuple[str, str]:
+    """Split ``text``, which must contain a space, at the space closest to its middle."""
+    mid = len(text) // 2
+    left = text.rfind(' ', 0, mid + 1)
+    right = text.find(' ', mid)
+    cut = min((i for i in (left, right) if i > 0), key=lambda i: abs(i - mid))
+    return text[:cut].rstrip(), text[cut:].lstrip()
+
+
+def _bucket_len(units: List[str]) -> int:
+    return sum(len(unit) for unit in units) + len(units) - 1
+
+
+def _greedy_pack(lengths, n_parts, total, max_part, out):
+    """Greedy pass of :func:`_partition` over unit ``lengths``.
+
+    Writes each unit's bucket index into ``out`` and returns the number of
+    buckets.  A bucket is closed once adding the next unit would exceed
+    ``max_part`` or overshoot the target length (the remaining text divided
+    by the remaining parts) by more than the bucket currently falls short
+    of it; units are joined by one space.  Kept to the subset of Python
+    that Numba can compile (see :func:`_pack_kernel`).
+    """
+    bucket = 0
+    current = 0
+    remaining = total
+    target = min(total / n_parts, float(max_part))
+    for k in range(len(lengths)):
+        length = lengths[k]
+        if current > 0:
+            grown = current + 1 + length
+            if grown > max_part or grown - target > target - current:
+                bucket += 1
+                remaining -= current + 1
+                target = remaining / max(n_parts - bucket, 1)
+                current = length
+            else:
+                current = grown
+        else:
+            current = length
+        out[k] = bucket
+    return bucket + 1
+
+
+def _pack_to_cap(lengths: List[int], cap: int, out: List[int]) -> int:
+    """Pack unit ``lengths`` into as few buckets of at most ``cap`` as possible.
+
+    Like :func:`_greedy_pack`, writes each unit's bucket index into ``out``
+    and returns the number of buckets; a bucket is only closed when the
+    next unit would not fit.  ``cap`` must be at least the longest unit.
+    """
+    bucket = 0
+    current = -1
+    for k, length in enumerate(lengths):
+        if current >= 0 and current + 1 + length > cap:
+            bucket += 1
+            current = -1
+        current += 1 + length
+        out[k] = bucket
+    return bucket + 1
+
+
+def _min_cap(lengths: List[int], n_parts: int, total: int, out: List[int]) -> int:
+    """Return the smallest cap for which :func:`_pack_to_cap` needs at most ``n_parts`` buckets.
+
+    No packing can make its longest bucket shorter, so this is the optimal
+    min-max partition; found by binary search, using ``out`` as scratch.
+    """
+    lo, hi = max(lengths), total
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if _pack_to_cap(lengths, mid, out) <= n_parts:
+            hi = mid
         else:
-            tentative = seg
-        # Reserve some space for numbering and emoji (~10 chars)
-        if len(tentative) + 15 > 260:  # near 280 limit minus numbering & emoji
-            parts.append(current)
-            current = seg
+            lo = mid + 1
+    return lo
+
+
+@functools.lru_cache(maxsize=None)
+def _pack_kernel():
+    """Return ``(compiled _greedy_pack, numpy)``, or ``None`` without Numba.
+
+    Numba and NumPy are optional and only imported the first time a very
+    long summary is partitioned.  ``cache=True`` stores the compiled code
+    on disk so later processes skip the JIT cost.
+    """
+    try:
+        import numba  # type: ignore
+        import numpy  # type: ignore
+    except ImportError:
+        return None
+    return numba.njit(cache=True)(_greedy_pack), numpy
+
+
+def _partition(sentences: List[str], n_parts: int) -> List[str]:
+    """Pack ``sentences`` into exactly ``n_parts`` parts of similar length.
+
+    Sentences are greedily packed in one pass into buckets whose target
+    length is the remaining text divided by the remaining number of parts
+    (never more than :data:`_MAX_PART`); only sentences longer than that
+    target are first wrapped at word boundaries.  If that yields too many
+    buckets, the units are re-packed under the smallest length cap that fits
+    them into ``n_parts`` buckets (see :func:`_min_cap`), cutting the
+    longest unit at a word while that cap exceeds :data:`_MAX_PART` and the
+    text could fit within it.  If there are too few, the longest buckets are
+    split, at a sentence boundary when they hold several sentences and at a
+    word boundary otherwise.  Words are never cut, so text with fewer words
+    than ``n_parts`` leaves trailing parts empty.
+    """
+    if not sentences:
+        return [""] * n_parts
+    total = _bucket_len(sentences)
+    target = min(total / n_parts, _MAX_PART)
+    # Whole sentences are the packing units.  Only a sentence longer than a
+    # bucket's target is wrapped, into that many roughly equal word-bounded
+    # pieces.  Units within a bucket are joined by single spaces.
+    units: List[str] = []
+    for sent in sentences:
+        if len(sent) <= target:
+            units.append(sent)
         else:
-            current = tentative
-    if current:
-        parts.append(current)
-    # Now we have a list of parts; merge or split to get exactly n_parts
-    # If too few parts, split the longest parts
-    while len(parts) < n_parts:
-        # Find the longest part
-        idx = max(range(len(parts)), key=lambda i: len(parts[i]))
-        part = parts.pop(idx)
-        half = len(part) // 2
-        parts.insert(idx, part[:half].strip())
-        parts.insert(idx + 1, part[half:].strip())
-    # If too many parts, merge smallest
-    while len(parts) > n_parts:
-        # Find two smallest parts
-        if len(parts) < 2:
-            break
-        idx = min(range(len(parts)-1), key=lambda i: len(parts[i]) + len(parts[i+1]))
-        merged = (parts[idx] + ' ' + parts[idx+1]).strip()
-        parts[idx:idx+2] = [merged]
-    return parts[:n_parts]
+            n_pieces = math.ceil(len(sent) / target)
+            width = max(math.ceil(len(sent) / n_pieces), 20)
+            units.extend(
+                textwrap.wrap(sent, width, break_long_words=False, break_on_hyphens=False)
+            )
+    # Greedy pass: assign every unit a bucket index, in native code for
+    # very long inputs when Numba is available.
+    kernel = _pack_kernel() if len(units) >= _JIT_MIN_UNITS else None
+    if kernel is not None:
+        pack, np = kernel
+        unit_lengths = np.fromiter(
+            (len(unit) for unit in units), dtype=np.int32, count=len(units)
+        )
+        ids = np.empty(len(units), dtype=np.int32)
+        pack(unit_lengths, n_parts, total, _MAX_PART, ids)
+        ids = ids.tolist()
+    else:
+        ids = [0] * len(units)
+        _greedy_pack([len(unit) for unit in units], n_parts, total, _MAX_PART, ids)
+    if ids[-1] + 1 > n_parts:
+        # Too many buckets: re-pack under the smallest cap that fits the
+        # units into n_parts buckets.  While that cap exceeds _MAX_PART but
+        # the text could still fit, cut the longest unit in two at a word
+        # and try again.
+        unit_lengths = [len(unit) for unit in units]
+        cap = _min_cap(unit_lengths, n_parts, total, ids)
+        while cap > _MAX_PART and total <= n_parts * (_MAX_PART + 1) - 1:
+            k = max(range(len(units)), key=unit_lengths.__getitem__)
+            if " " not in units[k]:
+                break
+            units[k : k + 1] = _split_at_word(units[k])
+            unit_lengths[k : k + 1] = [len(unit) for unit in units[k : k + 2]]
+            ids.append(0)
+            cap = _min_cap(unit_lengths, n_parts, total, ids)
+        if _greedy_pack(unit_lengths, n_parts, total, cap, ids) > n_parts:
+            _pack_to_cap(unit_lengths, cap, ids)
+    buckets: List[List[str]] = []
+    lengths: List[int] = []
+    for unit, bucket_id in zip(units, ids):
+        if bucket_id == len(buckets):
+            buckets.append([])
+            lengths.append(-1)
+        buckets[bucket_id].append(unit)
+        lengths[bucket_id] += len(unit) + 1
+
+    if len(buckets) < n_parts:
+        # Max-heap on length; the tuple key records document order, since a
+        # bucket keyed k splits into k + (0,) and k + (1,), which sort
+        # between k and its successor.  Single words cannot be split and are
+        # set aside.
+        heap = [
+            (-length, (i,), bucket) for i, (length, bucket) in enumerate(zip(lengths, buckets))
+        ]
+        heapq.heapify(heap)
+        words = []
+        while heap and len(heap) + len(words) < n_parts:
+            neg_len, key, bucket = heapq.heappop(heap)
+            if len(bucket) > 1:
+                # Cut at the first sentence boundary past half the length
+                half, acc, cut = -neg_len / 2, len(bucket[0]), 1
+                while cut < len(bucket) - 1 and acc < half:
+                    acc += len(bucket[cut]) + 1
+                    cut += 1
+                first, second = bucket[:cut], bucket[cut:]
+            elif " " in bucket[0]:
+                head, tail = _split_at_word(bucket[0])
+                first, second = [head], [tail]
+            else:
+                words.append((neg_len, key, bucket))
+                continue
+            heapq.heappush(heap, (-_bucket_len(first), key + (0,), first))
+            heapq.heappush(heap, (-_bucket_len(second), key + (1,), second))
+        buckets = [bucket for _, _, bucket in sorted(heap + words, key=lambda entry: entry[1])]
+
+    parts = [" ".join(bucket) for bucket in buckets]
+    return parts + [""] * (n_parts - len(parts))
+
+
+def _chunk_text(summary: str, n_parts: int) -> List[str]:
+    """Divide ``summary`` into ``n_parts`` roughly equal chunks by character length.
+
+    This function does not split in the middle of a word, and splits
+    between sentences unless that would push a part past :data:`_MAX_PART`
+    characters, which leaves room for the numbering within Twitter's
+    280-character limit (see :func:`_partition`).  A summary too long to fit
+    ``n_parts`` such parts is divided so that its longest part is as short
+    as possible.
+    """
+    builder = _ChunkBuilder()
+    builder.feed(summary)
+    return builder.finish(n_parts)
 
 
 def generate_thread(
@@ -104,6 +661,7 @@ def generate_thread(
     openai_api_key: Optional[str] = None,
     title: Optional[str] = None,
     max_tweets: int = 10,
+    cache_ok: bool = True,
 ) -> List[str]:
     """Generate a Twitter thread summarising the content at ``url``.
 
@@ -119,6 +677,10 @@ def generate_thread(
         domain will be used.
     max_tweets : int, default 10
         The number of tweets to generate.  Must be between 3 and 20.
+    cache_ok : bool, default True
+        Reuse a previously generated thread when the server reports the page
+        unchanged (via ``ETag`` / ``Last-Modified``), and reuse cached model
+        summaries.  Pass ``False`` to always regenerate.
 
     Returns
     -------
@@ -127,24 +689,132 @@ def generate_thread(
     """
     if max_tweets < 3 or max_tweets > 20:
         raise ValueError("max_tweets must be between 3 and 20")
-    page_title, description, content = fetch_content(url)
-    chosen_title = title or page_title or url
-    base_text = content if content else description
-    summary = _summarize_text(base_text, openai_api_key, target_words=300)
-    # Emoji list for visual interest
-    emojis = ["🚀", "💡", "📌", "🔍", "🔥", "📘", "✅", "🌟", "🎯", "🧠"]
-    parts = _chunk_text(summary, max_tweets)
-    tweets: List[str] = []
-    for i, part in enumerate(parts, start=1):
-        emoji = emojis[(i - 1) % len(emojis)]
-        header = f"{emoji} {i}/{max_tweets} "
-        if i == 1:
-            # Hook: mention the topic and hint at value
-            hook = f"{chosen_title.strip()} – here’s what you’ll learn:"  # hooking phrase
-            body = part.strip()
-            # Ensure the hook fits
-            first_tweet = f"{header}{hook}\n{body}"
-            tweets.append(first_tweet)
+    key = cache.make_key(url, max_tweets, title, _MODEL if openai_api_key else None)
+    cached = cache.get_thread(key) if cache_ok else None
+    etag, last_modified = (cached[0], cached[1]) if cached else (None, None)
+    page, etag, last_modified = fetch_content_conditional(url, etag, last_modified)
+    if page is None:
+        # 304 Not Modified: only possible when validators from ``cached`` were sent
+        return cached[2]
+    chosen_title = (title or page[0] or url).strip()
+    base_text = _base_text(page)
+    parts = None
+    if openai_api_key:
+        # Leave room for the larger of the two completions requested below
+        completion = max(_SUMMARY_TOKENS, _TWEET_TOKENS * max_tweets)
+        base_text = _truncate_tokens(base_text, _MODEL_CONTEXT - _PROMPT_OVERHEAD - completion)
+        parts = _generate_tweet_parts(base_text, openai_api_key, max_tweets, cache_ok)
+    complete = True
+    if parts is None:
+        # Pack sentences into tweets while the summary is still streaming in
+        builder = _ChunkBuilder()
+        _, complete = _summarize_with_status(
+            base_text,
+            openai_api_key,
+            target_words=300,
+            cache_ok=cache_ok,
+            on_delta=builder.feed,
+        )
+        parts = builder.finish(max_tweets)
+    tweets = _build_thread(parts, chosen_title, max_tweets)
+    # A thread built from a failed model call must not outlive the failure
+    if cache_ok and complete and (etag or last_modified):
+        cache.put_thread(key, etag, last_modified, tweets)
+    return tweets
+
+
+def generate_threads(
+    urls: Sequence[str],
+    openai_api_key: Optional[str] = None,
+    max_tweets: int = 10,
+) -> List[Union[List[str], BaseException]]:
+    """Generate one thread per URL in ``urls``.
+
+    This is the batch counterpart of :func:`generate_thread`.  Pages are
+    downloaded in parallel on a thread pool sharing the scraper's pooled
+    HTTP session.  As soon as enough downloaded pages have accumulated to
+    fill one OpenAI request, they are handed to a second pool to be
+    summarised together (see :func:`_summarize_texts`) while the remaining
+    downloads continue.  Each thread uses its page's title for the hook.
+
+    Returns
+    -------
+    list
+        One entry per URL, in the same order as ``urls``: either the thread
+        (a list of str) or the exception raised while fetching the page, as
+        with :func:`~auto_tweet_thread_writer.scraper.fetch_many`.  Pages
+        that could not be fetched are not summarised, and one bad URL does
+        not discard the summaries of the others.
+    """
+    if max_tweets < 3 or max_tweets > 20:
+        raise ValueError("max_tweets must be between 3 and 20")
+    if not urls:
+        return []
+    pages: List[Tuple[str, str, str]] = [("", "", "")] * len(urls)
+    errors: List[Optional[BaseException]] = [None] * len(urls)
+    summaries: List[str] = [""] * len(urls)
+    workers = min(32, len(urls))
+    with ThreadPoolExecutor(max_workers=workers) as fetch_pool, ThreadPoolExecutor(
+        max_workers=workers
+    ) as summary_pool:
+        fetches = {fetch_pool.submit(fetch_content, url): i for i, url in enumerate(urls)}
+        jobs: List[Tuple[List[int], Future]] = []
+        pending: List[int] = []
+        pending_tokens = _PROMPT_OVERHEAD
+
+        def submit_pending() -> None:
+            texts = [_base_text(pages[i]) for i in pending]
+            future = summary_pool.submit(_summarize_texts, texts, openai_api_key, 300)
+            jobs.append((list(pending), future))
+            pending.clear()
+
+        for future in as_completed(fetches):
+            i = fetches[future]
+            errors[i] = future.exception()
+            if errors[i] is not None:
+                continue
+            pages[i] = future.result()
+            cost = _batch_cost(_base_text(pages[i])) if openai_api_key else 0
+            if pending and (
+                pending_tokens + cost > _MODEL_CONTEXT or len(pending) >= _MAX_BATCH_DOCS
+            ):
+                submit_pending()
+                pending_tokens = _PROMPT_OVERHEAD
+            pending.append(i)
+            pending_tokens += cost
+        if pending:
+            submit_pending()
+        for indices, future in jobs:
+            for i, summary in zip(indices, future.result()):
+                summaries[i] = summary
+    threads: List[Union[List[str], BaseException]] = []
+    for url, (page_title, _, _), summary, error in zip(urls, pages, summaries, errors):
+        if error is not None:
+            threads.append(error)
         else:
-            tweets.append(f"{header}{part.strip()}")
-    return tweets
\ No newline at end of file
+            parts = _chunk_text(summary, max_tweets)
+            threads.append(_build_thread(parts, page_title or url.strip(), max_tweets))
+    return threads
+
+
+def _base_text(page: Tuple[str, str, str]) -> str:
+    """Return the text to summarise for ``page``: its content, else its description."""
+    _, description, content = page
+    return content if content else description
+
+
+def _build_thread(parts: List[str], chosen_title: str, max_tweets: int) -> List[str]:
+    """Turn summary ``parts`` into numbered tweets, the first carrying a hook.
+
+    ``parts`` and ``chosen_title`` must already be stripped; every producer
+    of parts (:func:`_partition`, :func:`_generate_tweet_parts`) strips its
+    text once on the way in, so no further copies are made here.
+    """
+    headers = [
+        f"{_EMOJIS[(i - 1) % len(_EMOJIS)]} {i}/{max_tweets} " for i in range(1, max_tweets + 1)
+    ]
+    tweets = ["".join((header, part)) for header, part in zip(headers, parts)]
+    # Hook: mention the topic and hint at value
+    hook = f"{chosen_title} – here’s what you’ll learn:"
+    tweets[0] = "".join((headers[0], hook, "\n", parts[0]))
+    return tweets